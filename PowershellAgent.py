@@ -4,12 +4,22 @@ This agent can execute PowerShell commands based on natural language instruction
 """
 
 import os
+import asyncio
+import atexit
+import base64
+import collections
+import functools
+import json
+import queue
+import re
 import subprocess
+import threading
+import time
+import uuid
+from diskcache import Cache
 from dotenv import load_dotenv
-from langchain.tools import tool
-from langchain.agents import create_agent
-from langchain.chat_models import init_chat_model
-from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
 
 # Rich imports for CLI interface
 from rich.console import Console
@@ -19,7 +29,7 @@ from rich.prompt import Prompt
 from rich.markdown import Markdown
 from rich.table import Table
 from rich import box
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.live import Live
 
 
 # Initialize Rich Console
@@ -28,25 +38,446 @@ console = Console()
 # Load environment variables
 load_dotenv()
 
+# Responses already produced this session, keyed on the normalized user input.
+# Only turns that ran no tools are stored, since tool output reflects live system state.
+_exact_cache: dict[str, str] = {}
+
+
+class ConditionTokenBucket(BaseRateLimiter):
+    """
+    Token-bucket rate limiter that wakes waiters when a token is added.
+    
+    InMemoryRateLimiter polls for tokens on a fixed interval; here a daemon
+    thread refills the bucket on schedule and notifies a condition variable,
+    so callers block without spinning and proceed as soon as a token exists.
+    """
+    
+    def __init__(self, requests_per_second: float, max_bucket_size: int):
+        self.capacity = max_bucket_size
+        self.refill_per_sec = requests_per_second
+        # Start full so the first request of a session does not wait for a refill
+        self.tokens = float(max_bucket_size)
+        self._paused_until = 0.0
+        self._cv = threading.Condition()
+        threading.Thread(target=self._refill, daemon=True).start()
+    
+    def _refill(self):
+        """Add one token every 1/refill_per_sec seconds, capped at capacity."""
+        interval = 1 / self.refill_per_sec
+        next_refill = time.monotonic() + interval
+        while True:
+            time.sleep(max(0, next_refill - time.monotonic()))
+            next_refill += interval
+            with self._cv:
+                if time.monotonic() >= self._paused_until:
+                    self.tokens = min(self.capacity, self.tokens + 1)
+                    self._cv.notify()
+    
+    def pause(self, seconds: float):
+        """
+        Empty the bucket and stop refilling it for a while.
+        
+        Args:
+            seconds: How long to withhold new tokens
+        """
+        with self._cv:
+            self.tokens = 0.0
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """
+        Take one token from the bucket.
+        
+        Args:
+            blocking: Wait for a token if none is available
+        
+        Returns:
+            True if a token was taken, False if non-blocking and the bucket is empty
+        """
+        with self._cv:
+            if blocking:
+                self._cv.wait_for(lambda: self.tokens >= 1)
+            elif self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+    
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        """Async version of acquire that waits off the event loop."""
+        return await asyncio.to_thread(self.acquire, blocking=blocking)
+
+
 # Initialize rate limiter for 4 RPM (requests per minute)
 # 4 requests per minute = 1 request every 15 seconds
-rate_limiter = InMemoryRateLimiter(
+rate_limiter = ConditionTokenBucket(
     requests_per_second=4/60,  # 4 requests per 60 seconds
-    check_every_n_seconds=0.1,  # Check every 100ms
     max_bucket_size=4,  # Maximum burst size
 )
 
-# Initialize Google Gemini Flash 2.0 model with rate limiter
-model = init_chat_model(
-    model="gemini-2.0-flash",
-    model_provider="google_genai",
-    rate_limiter=rate_limiter,
-    max_tokens=500,  # Limit output tokens to 500
-    temperature=0.7,
-)
+
+def _parse_retry_after(value) -> float | None:
+    """Parse a retry-after value such as '30', '30s' or '1.5s' into seconds."""
+    match = re.match(r"\s*(\d+(?:\.\d+)?)\s*s?\s*$", str(value)) if value is not None else None
+    return float(match.group(1)) if match else None
+
+
+def _error_status(error: BaseException) -> tuple[int | None, BaseException | None]:
+    """
+    Find the HTTP status code behind a model error.
+    
+    LangChain wraps provider errors, so the exception and its causes are
+    searched for a numeric code (google-genai and google-api-core expose
+    one as .code).
+    
+    Returns:
+        A tuple of (status code, exception carrying it), or (None, None)
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        for status in (
+            getattr(error, "code", None),
+            getattr(error, "status_code", None),
+            getattr(getattr(error, "response", None), "status_code", None),
+        ):
+            if isinstance(status, int):
+                return int(status), error
+        error = error.__cause__ or error.__context__
+    return None, None
+
+
+class RateLimitReactive(BaseCallbackHandler):
+    """
+    Pause the token bucket when the provider reports that quota is running out.
+    
+    The bucket enforces 4 RPM on its own; this handler adds the provider's view
+    by reading rate-limit metadata from responses and retry delays from 429s.
+    """
+    
+    def __init__(self, limiter: ConditionTokenBucket, default_retry_after: float = 60):
+        self.limiter = limiter
+        self.default_retry_after = default_retry_after
+    
+    def on_llm_end(self, response, **kwargs):
+        """Pause the limiter if the response reports few remaining requests."""
+        metadata = dict(response.llm_output or {})
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                metadata.update(getattr(message, "response_metadata", None) or {})
+        
+        try:
+            remaining = int(metadata["x-ratelimit-remaining-requests"])
+        except (KeyError, TypeError, ValueError):
+            return
+        try:
+            limit = int(metadata.get("x-ratelimit-limit-requests"))
+        except (TypeError, ValueError):
+            limit = None
+        
+        if remaining <= 2 or (limit and remaining < 0.1 * limit):
+            retry_after = _parse_retry_after(metadata.get("retry-after"))
+            self.limiter.pause(retry_after or self.default_retry_after)
+    
+    def on_llm_error(self, error, **kwargs):
+        """Pause the limiter for the provider's retry delay after a 429."""
+        status, source = _error_status(error)
+        if status != 429:
+            return
+        
+        retry_after = None
+        # Prefer the HTTP Retry-After header, then Gemini's RetryInfo retry delay
+        response = getattr(source, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers:
+            retry_after = _parse_retry_after(headers.get("retry-after"))
+        if retry_after is None:
+            match = re.search(
+                r"retry_?delay\D{0,30}?(\d+(?:\.\d+)?)",
+                str(getattr(source, "details", "")),
+                re.IGNORECASE
+            )
+            retry_after = float(match.group(1)) if match else None
+        self.limiter.pause(retry_after or self.default_retry_after)
+
+
+# Pauses the rate limiter when Gemini signals that quota is exhausted
+rate_limit_reactive = RateLimitReactive(rate_limiter)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD controller for how many agent calls run_agent_many keeps in flight.
+    
+    The limit grows additively while recent calls finish under the target
+    latency and is halved whenever the provider reports overload (429/5xx).
+    """
+    
+    def __init__(self, target_latency: float = 20.0, max_concurrency: int = 4, increase: float = 0.5):
+        self.target_latency = target_latency
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.concurrency = 1.0
+        self.latencies = collections.deque(maxlen=20)
+    
+    @property
+    def limit(self) -> int:
+        """Number of calls currently allowed in flight."""
+        return max(1, int(self.concurrency))
+    
+    def record_success(self, latency: float):
+        """Record a completed call and grow the limit if latency is on target."""
+        self.latencies.append(latency)
+        if sum(self.latencies) / len(self.latencies) < self.target_latency:
+            self.concurrency = min(self.max_concurrency, self.concurrency + self.increase)
+    
+    def record_overload(self):
+        """Halve the limit after a rate-limit or server error."""
+        self.concurrency = max(1.0, self.concurrency * 0.5)
+
+
+# Shared AIMD state for batch runs, capped at the rate limiter's burst size
+concurrency = AdaptiveConcurrency(max_concurrency=4)
+
+
+# Most characters of command output passed back to the model per stream
+MAX_OUTPUT_CHARS = 8192
+
+
+class PersistentPowerShell:
+    """
+    A long-lived PowerShell host that executes commands over stdio.
+    
+    Spawning powershell.exe costs a few hundred milliseconds per call, so a
+    single process is kept open and each command is followed by a unique
+    sentinel line that marks the end of its output on stdout and stderr.
+    """
+    
+    ARGS = [
+        "powershell",
+        "-NoLogo",
+        "-NoProfile",
+        "-NonInteractive",
+        "-ExecutionPolicy", "Bypass",
+        "-Command", "-",
+    ]
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._proc = None
+        self._stdout = None
+        self._stderr = None
+    
+    def _start(self):
+        """Spawn the PowerShell process and its stdout/stderr reader threads."""
+        self._proc = subprocess.Popen(
+            self.ARGS,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            bufsize=1,
+        )
+        self._stdout = queue.Queue()
+        self._stderr = queue.Queue()
+        for stream, lines in ((self._proc.stdout, self._stdout), (self._proc.stderr, self._stderr)):
+            threading.Thread(target=self._drain, args=(stream, lines), daemon=True).start()
+    
+    @staticmethod
+    def _drain(stream, lines):
+        """Forward every line of a pipe into a queue; None marks end of stream."""
+        for line in stream:
+            lines.put(line)
+        lines.put(None)
+    
+    @staticmethod
+    def _read_until(lines, sentinel, deadline, max_chars):
+        """
+        Collect lines from a queue until the sentinel is seen.
+        
+        Lines past max_chars are read and discarded so memory stays bounded
+        while the stream is still drained up to the sentinel.
+        
+        Returns:
+            A tuple of (text, sentinel suffix); text ends with a truncation note when capped
+        """
+        collected = []
+        size = 0
+        total = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise queue.Empty
+            line = lines.get(timeout=remaining)
+            if line is None:
+                raise EOFError("PowerShell host exited unexpectedly")
+            # Output written without a trailing newline puts the sentinel mid-line
+            index = line.find(sentinel)
+            if index >= 0:
+                line, suffix = line[:index], line[index + len(sentinel):]
+            total += len(line)
+            if max_chars is None or size < max_chars:
+                collected.append(line)
+                size += len(line)
+            if index >= 0:
+                break
+        
+        text = "".join(collected)
+        if max_chars is not None and total > max_chars:
+            text = f"{text[:max_chars]}\n...[truncated, {total} characters total]"
+        return text, suffix.strip()
+    
+    def run(self, command: str, timeout: float = 30, max_chars: int | None = MAX_OUTPUT_CHARS) -> subprocess.CompletedProcess:
+        """
+        Execute a command in the persistent host.
+        
+        Args:
+            command: The PowerShell command to execute
+            timeout: Seconds to wait for the command to finish
+            max_chars: Keep at most this many characters of stdout and stderr (None for no limit)
+        
+        Returns:
+            A CompletedProcess with returncode 1 if the command's pipeline failed,
+            raised an uncaught error or wrote to stderr, and 0 otherwise
+        """
+        sentinel = f"<<<EOF:{uuid.uuid4().hex}>>>"
+        # Base64 keeps quoting and newlines in the command from breaking the stdin protocol
+        encoded = base64.b64encode(command.encode("utf-8")).decode("ascii")
+        # $? is read right after the command's pipeline, so errors the command
+        # caught itself (unlike everything recorded in $Error) don't mark it as failed.
+        # Invoke-Expression leaves $? set after non-terminating errors, so any
+        # stderr output is also treated as failure below.
+        script = (
+            f"try {{ Invoke-Expression ([Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{encoded}'))) | Out-String -Stream; $__ok = $? }} "
+            "catch { $__ok = $false; [Console]::Error.WriteLine($_) }; "
+            f"Write-Output \"{sentinel}$__ok\"; "
+            f"[Console]::Error.WriteLine('{sentinel}')\n"
+        )
+        
+        with self._lock:
+            if self._proc is None or self._proc.poll() is not None:
+                self._start()
+            
+            deadline = time.monotonic() + timeout
+            try:
+                self._proc.stdin.write(script)
+                self._proc.stdin.flush()
+                stdout, ok = self._read_until(self._stdout, sentinel, deadline, max_chars)
+                stderr, _ = self._read_until(self._stderr, sentinel, deadline, max_chars)
+            except queue.Empty:
+                # The host is stuck on the command; discard it so the next call starts fresh
+                self.close()
+                raise subprocess.TimeoutExpired(command, timeout)
+            except (EOFError, OSError):
+                self.close()
+                raise
+        
+        return subprocess.CompletedProcess(
+            args=command,
+            returncode=0 if ok == "True" and not stderr.strip() else 1,
+            stdout=stdout,
+            stderr=stderr,
+        )
+    
+    def close(self):
+        """Terminate the PowerShell process if it is running."""
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+            self._proc.wait()
+        self._proc = None
+
+
+class PwshPool:
+    """
+    A fixed-size pool of PersistentPowerShell hosts for stateless lookups.
+    
+    Consecutive calls may land on different hosts, so only commands that
+    don't depend on session state (help searches) should use the pool.
+    Hosts start lazily on first use.
+    """
+    
+    def __init__(self, size: int = 1):
+        self._hosts = [PersistentPowerShell() for _ in range(max(1, size))]
+        self._q = queue.Queue()
+        for host in self._hosts:
+            self._q.put(host)
+    
+    def checkout(self) -> PersistentPowerShell:
+        """Take a host from the pool, waiting until one is free."""
+        return self._q.get()
+    
+    def checkin(self, host: PersistentPowerShell):
+        """Return a host to the pool."""
+        self._q.put(host)
+    
+    def run(self, command: str, timeout: float = 30, max_chars: int | None = MAX_OUTPUT_CHARS) -> subprocess.CompletedProcess:
+        """Execute a command on a free host; see PersistentPowerShell.run."""
+        host = self.checkout()
+        try:
+            return host.run(command, timeout=timeout, max_chars=max_chars)
+        finally:
+            self.checkin(host)
+    
+    def close(self):
+        """Terminate every host in the pool."""
+        for host in self._hosts:
+            host.close()
+
+
+# Session host for executed commands, so location and variables carry across calls
+powershell = PersistentPowerShell()
+atexit.register(powershell.close)
+
+def _pool_size(default: int = 1) -> int:
+    """Read PSAGENT_POOL_SIZE, falling back to the default if it isn't a positive integer."""
+    try:
+        size = int(os.getenv("PSAGENT_POOL_SIZE", str(default)))
+    except ValueError:
+        return default
+    return size if size >= 1 else default
+
+
+# Separate hosts for help searches so they don't wait behind a running command;
+# size set by PSAGENT_POOL_SIZE
+help_pool = PwshPool(size=_pool_size())
+atexit.register(help_pool.close)
+
+
+# Most result rows formatted and returned for commands that don't bound their own output
+MAX_OUTPUT_ROWS = 200
+
+# Commands that already send output to a file or limit it are left untouched
+_WRITES_OUTPUT_PATTERN = re.compile(r"\b(Out-File|Export-\w+|Set-Content)\b", re.IGNORECASE)
+_LIMITS_OUTPUT_PATTERN = re.compile(r"\b(Select-Object|select)\b.*-First\b", re.IGNORECASE)
+
+
+def _limit_rows(command: str) -> str:
+    """
+    Cap the rows an open-ended command returns before PowerShell formats them.
+    
+    The command is dot-sourced in a script block so multi-statement commands
+    are bounded as a whole and variables still land in the session scope.
+    Extra rows are dropped rather than stopping the pipeline, so the command
+    still runs to completion, and a note reports how many were cut.
+    
+    Args:
+        command: The PowerShell command to execute
+    
+    Returns:
+        The command, with output past MAX_OUTPUT_ROWS rows dropped when unbounded
+    """
+    if _WRITES_OUTPUT_PATTERN.search(command) or _LIMITS_OUTPUT_PATTERN.search(command):
+        return command
+    return (
+        f". {{\n{command}\n}} | ForEach-Object "
+        "-Begin { $__psagent_rows = 0 } "
+        f"-Process {{ if ($__psagent_rows++ -lt {MAX_OUTPUT_ROWS}) {{ $_ }} }} "
+        f"-End {{ if ($__psagent_rows -gt {MAX_OUTPUT_ROWS}) {{ \"[$($__psagent_rows - {MAX_OUTPUT_ROWS}) more rows truncated]\" }} }} "
+        "| Out-String -Width 200"
+    )
 
 
-@tool
 def execute_powershell_command(command: str) -> str:
     """
     Execute a PowerShell command on the terminal and return the output.
@@ -58,21 +489,18 @@ def execute_powershell_command(command: str) -> str:
         The command output or error message
     """
     try:
-        # Execute PowerShell command
-        result = subprocess.run(
-            ["powershell", "-Command", command],
-            capture_output=True,
-            text=True,
-            timeout=30,  # 30 second timeout
-            shell=False
-        )
+        # Execute PowerShell command in the persistent host
+        result = powershell.run(_limit_rows(command), timeout=30)  # 30 second timeout
         
+        output = result.stdout.strip()
         if result.returncode == 0:
-            output = result.stdout.strip()
             return output if output else "Command executed successfully with no output."
         else:
             error = result.stderr.strip()
-            return f"Error executing command: {error}"
+            if not error:
+                # Failed without an error message; the output is still the useful part
+                return output if output else "Error executing command: the command failed with no output."
+            return f"{output}\n\nError executing command: {error}" if output else f"Error executing command: {error}"
             
     except subprocess.TimeoutExpired:
         return "Error: Command execution timed out (30 seconds limit)."
@@ -80,7 +508,136 @@ def execute_powershell_command(command: str) -> str:
         return f"Error: {str(e)}"
 
 
-@tool
+def execute_powershell_batch(commands: list[str]) -> list[str]:
+    """
+    Execute several PowerShell commands in a single invocation and return each output.
+    
+    Args:
+        commands: The PowerShell commands to execute, in order (e.g., ['Get-Date', 'Get-Location'])
+    
+    Returns:
+        One output (or 'ERR: <message>') per command, in the same order
+    """
+    if not commands:
+        return []
+    
+    # Commands are base64-encoded so quotes and newlines survive the PowerShell array literal
+    encoded = ", ".join(
+        f"'{base64.b64encode(_limit_rows(c).encode('utf-8')).decode('ascii')}'" for c in commands
+    )
+    # Loop variables are prefixed and removed afterwards so they don't clobber the
+    # session's variables; the commands themselves still run in session scope
+    script = (
+        "$__psagent_results = @(); "
+        f"foreach ($__psagent_c in @({encoded})) {{ "
+        "$__psagent_cmd = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($__psagent_c)); "
+        "try { $__psagent_out = (Invoke-Expression $__psagent_cmd 2>&1 | Out-String).Trim() } "
+        "catch { $__psagent_out = \"ERR: $_\" }; "
+        f"if ($__psagent_out.Length -gt {MAX_OUTPUT_CHARS}) {{ $__psagent_out = $__psagent_out.Substring(0, {MAX_OUTPUT_CHARS}) + \"`n...[truncated, $($__psagent_out.Length) characters total]\" }}; "
+        "$__psagent_results += $__psagent_out }; "
+        "ConvertTo-Json -InputObject $__psagent_results -Compress; "
+        "Remove-Variable __psagent_results, __psagent_c, __psagent_cmd, __psagent_out -ErrorAction SilentlyContinue"
+    )
+    
+    try:
+        # Each output is capped in PowerShell, so the JSON itself is read whole
+        result = powershell.run(script, timeout=30, max_chars=None)  # 30 second timeout for the whole batch
+        outputs = json.loads(result.stdout)
+        # ConvertTo-Json unwraps single-element arrays
+        return [outputs] if isinstance(outputs, str) else outputs
+    except subprocess.TimeoutExpired:
+        return ["Error: Batch execution timed out (30 seconds limit)."]
+    except json.JSONDecodeError:
+        return [f"Error executing batch: {result.stderr.strip() or result.stdout.strip()}"]
+    except Exception as e:
+        return [f"Error: {str(e)}"]
+
+
+def _format_help_json(output: str) -> str:
+    """
+    Turn ConvertTo-Json help output into terse text for the model.
+    
+    Args:
+        output: Compact JSON emitted by PowerShell (an object or an array of objects)
+    
+    Returns:
+        One 'Name - Synopsis' line per item, followed by its indented syntax lines;
+        output that isn't JSON (plain-text help) is returned unchanged, and an
+        empty string if no item has a name
+    """
+    try:
+        items = json.loads(output)
+    except json.JSONDecodeError:
+        return output
+    if isinstance(items, str):
+        return items
+    # ConvertTo-Json unwraps single-element arrays
+    if not isinstance(items, list):
+        items = [items]
+    
+    lines = []
+    for item in items:
+        # Items without a name carry no structured help
+        if not isinstance(item, dict) or not item.get("Name"):
+            continue
+        synopsis = (item.get("Synopsis") or "").strip()
+        lines.append(f"{item.get('Name')} - {synopsis}" if synopsis else str(item.get("Name")))
+        for syntax in (item.get("Syntax") or "").splitlines():
+            if syntax.strip():
+                lines.append(f"  {syntax.strip()}")
+    return "\n".join(lines)
+
+
+# Help lookups persisted across runs; PowerShell help rarely changes
+_HELP_CACHE = Cache(os.path.expanduser("~/.cache/psagent_help"))
+atexit.register(_HELP_CACHE.close)
+
+
+@functools.lru_cache(maxsize=256)
+@_HELP_CACHE.memoize(expire=7 * 86400)
+def _search_impl(query_norm: str) -> str:
+    """
+    Look up help for a normalized query in PowerShell.
+    
+    Help output is near-static, so results are cached per query in memory and
+    on disk for a week. Timeouts and other failures propagate as exceptions
+    and are therefore never cached.
+    
+    Args:
+        query_norm: The stripped, lower-cased search query
+    
+    Returns:
+        Help documentation, related commands, or a not-found message
+    """
+    # Try to get help for the command, keeping only the fields the model needs;
+    # conceptual (about_*) topics come back as plain strings and are passed through
+    help_command = (
+        f"$help = Get-Help {query_norm} -ErrorAction SilentlyContinue | Select-Object -First 5; "
+        "if ($help -is [string]) { $help } else { "
+        "$help | Select-Object Name, Synopsis, @{n='Syntax';e={$_.Syntax | Out-String}} | "
+        "ConvertTo-Json -Compress -Depth 3 }"
+    )
+    result = help_pool.run(help_command, timeout=15)
+    
+    if result.returncode == 0 and result.stdout.strip():
+        formatted = _format_help_json(result.stdout.strip())
+        if formatted:
+            return formatted
+    
+    # If no specific help found, try searching for related commands
+    search_command = (
+        f"Get-Command *{query_norm}* -ErrorAction SilentlyContinue | "
+        "Select-Object -First 5 Name, Synopsis | "
+        "ConvertTo-Json -Compress"
+    )
+    result = help_pool.run(search_command, timeout=15)
+    
+    related = _format_help_json(result.stdout.strip()) if result.returncode == 0 else ""
+    if related:
+        return f"Related commands found:\n{related}\n\nUse Get-Help <command-name> for more details."
+    return f"No help found for '{query_norm}'. Try using more specific command names like Get-Process, Get-Service, etc."
+
+
 def search_powershell_command(query: str) -> str:
     """
     Search for PowerShell command usage and help documentation.
@@ -93,42 +650,15 @@ def search_powershell_command(query: str) -> str:
         Help documentation and usage examples for the command
     """
     try:
-        # Try to get help for the command
-        help_command = f"Get-Help {query} -ErrorAction SilentlyContinue"
-        result = subprocess.run(
-            ["powershell", "-Command", help_command],
-            capture_output=True,
-            text=True,
-            timeout=15,
-            shell=False
-        )
-        
-        if result.returncode == 0 and result.stdout.strip():
-            return result.stdout.strip()
-        else:
-            # If no specific help found, try searching for related commands
-            search_command = f"Get-Command *{query}* -ErrorAction SilentlyContinue | Select-Object -First 5 Name, Synopsis"
-            result = subprocess.run(
-                ["powershell", "-Command", search_command],
-                capture_output=True,
-                text=True,
-                timeout=15,
-                shell=False
-            )
-            
-            if result.returncode == 0 and result.stdout.strip():
-                return f"Related commands found:\n{result.stdout.strip()}\n\nUse Get-Help <command-name> for more details."
-            else:
-                return f"No help found for '{query}'. Try using more specific command names like Get-Process, Get-Service, etc."
-                
+        return _search_impl(query.strip().lower())
     except subprocess.TimeoutExpired:
         return "Error: Search timed out."
     except Exception as e:
         return f"Error searching for command: {str(e)}"
 
 
-# Create the agent with tools
-tools = [execute_powershell_command, search_powershell_command]
+# Tools exposed to the agent
+tools = [execute_powershell_command, execute_powershell_batch, search_powershell_command]
 
 system_prompt = """You are a helpful PowerShell assistant. You can execute PowerShell commands on the user's Windows machine.
 
@@ -139,23 +669,92 @@ IMPORTANT GUIDELINES:
 4. Always provide clear, concise explanations of command outputs.
 5. Suggest safer alternatives when appropriate.
 6. Keep responses under 500 tokens.
+7. When a request needs several independent commands, run them together with execute_powershell_batch.
 
 Available tools:
 - execute_powershell_command: Execute PowerShell commands on the terminal
+- execute_powershell_batch: Execute several PowerShell commands in one call and get one output per command
 - search_powershell_command: Search for PowerShell command help and documentation
 """
 
-# Create agent using LangChain v1
-agent = create_agent(
-    model=model,
-    tools=tools,
-    system_prompt=system_prompt
-)
+# Agent and model, built on first use by _build_agent()
+_agent = None
+_agent_lock = threading.Lock()
 
 
-def print_banner():
-    """Display the ASCII art banner."""
-    banner = """
+def _build_agent():
+    """
+    Import LangChain and create the model and agent on first use.
+    
+    LangChain and the Gemini client take a second or more to import, so this
+    is deferred until after the banner is shown; later calls return the
+    already-built pair.
+    
+    Returns:
+        A tuple of (agent, model)
+    """
+    global _agent
+    with _agent_lock:
+        if _agent is None:
+            import httpx
+            from langchain.tools import tool
+            from langchain.agents import create_agent
+            from langchain.chat_models import init_chat_model
+            from langchain_core.globals import set_llm_cache
+            from langchain_community.cache import SQLiteCache
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            
+            # Cache identical LLM calls on disk so repeated prompts skip the API and the rate limiter
+            set_llm_cache(SQLiteCache(database_path=".psagent_llm_cache.sqlite"))
+            
+            # Keep one HTTP/2 connection alive between calls to skip repeated TLS handshakes.
+            # client_args only configures httpx in langchain-google-genai releases that
+            # define the field (older ones would forward it to the API as a model kwarg).
+            # It applies to sync calls; when aiohttp is installed google-genai uses it for
+            # async calls (run_agent_many) and ignores the httpx-only settings there.
+            http_kwargs = {}
+            if "client_args" in ChatGoogleGenerativeAI.model_fields:
+                http_kwargs["client_args"] = {
+                    "http2": True,
+                    "limits": httpx.Limits(max_keepalive_connections=4, keepalive_expiry=120),
+                }
+            
+            # Initialize Google Gemini Flash 2.0 model with rate limiter
+            model = init_chat_model(
+                model="gemini-2.0-flash",
+                model_provider="google_genai",
+                rate_limiter=rate_limiter,
+                callbacks=[rate_limit_reactive],
+                max_tokens=500,  # Limit output tokens to 500
+                temperature=0.7,
+                **http_kwargs,
+            )
+            
+            # Create agent using LangChain v1
+            agent = create_agent(
+                model=model,
+                tools=[tool(t) for t in tools],
+                system_prompt=system_prompt
+            )
+            _agent = (agent, model)
+    return _agent
+
+
+def _warm_up_agent():
+    """
+    Build the agent in the background, ignoring failures.
+    
+    Errors such as a missing GOOGLE_API_KEY would otherwise print a raw
+    traceback over the prompt; run_agent retries the build and reports
+    the error in a panel instead.
+    """
+    try:
+        _build_agent()
+    except Exception:
+        pass
+
+
+_BANNER_STR = """
 ██████╗  ██████╗ ██╗    ██╗███████╗██████╗ ███████╗██╗  ██╗███████╗██╗     ██╗     
 ██╔══██╗██╔═══██╗██║    ██║██╔════╝██╔══██╗██╔════╝██║  ██║██╔════╝██║     ██║     
 ██████╔╝██║   ██║██║ █╗ ██║█████╗  ██████╔╝███████╗███████║█████╗  ██║     ██║     
@@ -170,10 +769,22 @@ def print_banner():
 ██║  ██║╚██████╔╝███████╗██║ ╚████║   ██║                                          
 ╚═╝  ╚═╝ ╚═════╝ ╚══════╝╚═╝  ╚═══╝   ╚═╝                                          
     """
-    console.print(banner, style="bold bright_magenta")
+
+# Built once; rich renders the pre-styled Text without re-parsing the string
+_BANNER = Text(_BANNER_STR, style="bold bright_magenta")
+
+
+def print_banner():
+    """Display the ASCII art banner."""
+    console.print(_BANNER)
     console.print("\n")
-    
-    # Info panel
+    console.print(_build_info_panel())
+    console.print()
+
+
+@functools.cache
+def _build_info_panel() -> Panel:
+    """Build the info panel shown under the banner."""
     info_text = Text()
     info_text.append("Execute PowerShell commands using natural language\n", style="white")
     info_text.append("Powered by ", style="dim")
@@ -181,17 +792,23 @@ def print_banner():
     info_text.append(" + ", style="dim")
     info_text.append("LangChain v1", style="bold magenta")
     
-    console.print(Panel(
+    return Panel(
         info_text,
         box=box.ROUNDED,
         border_style="cyan",
         padding=(1, 2)
-    ))
-    console.print()
+    )
 
 
 def show_config():
     """Display configuration settings."""
+    console.print(_build_config_panel())
+    console.print()
+
+
+@functools.cache
+def _build_config_panel() -> Panel:
+    """Build the configuration panel; settings are fixed for the session."""
     table = Table(show_header=False, box=box.SIMPLE, padding=(0, 2))
     table.add_column(style="cyan bold")
     table.add_column(style="white")
@@ -201,18 +818,24 @@ def show_config():
     table.add_row("📝 Max Tokens:", "500")
     table.add_row("🔍 LangSmith:", "Enabled" if os.getenv("LANGSMITH_TRACING") == "true" else "Disabled")
     
-    console.print(Panel(
+    return Panel(
         table,
         title="[bold yellow]⚙️  Configuration[/bold yellow]",
         box=box.ROUNDED,
         border_style="yellow",
         padding=(1, 2)
-    ))
-    console.print()
+    )
 
 
 def show_examples():
     """Display example queries."""
+    console.print(_build_examples_text())
+    console.print()
+
+
+@functools.cache
+def _build_examples_text() -> Text:
+    """Build the numbered list of example queries."""
     examples = [
         "List all files in the current directory",
         "Show me the top 5 processes by CPU usage",
@@ -221,20 +844,89 @@ def show_examples():
         "Show all running services",
     ]
     
-    console.print("[bold cyan]💡 Example Queries:[/bold cyan]")
+    lines = ["[bold cyan]💡 Example Queries:[/bold cyan]"]
     for i, example in enumerate(examples, 1):
-        console.print(f"  [dim]{i}.[/dim] [white]{example}[/white]")
+        lines.append(f"  [dim]{i}.[/dim] [white]{example}[/white]")
+    return Text.from_markup("\n".join(lines))
+
+
+def show_instructions():
+    """Display usage instructions and built-in commands."""
+    console.print(_build_instructions_panel())
     console.print()
 
 
-def run_agent(user_input: str):
+@functools.cache
+def _build_instructions_panel() -> Panel:
+    """Build the instructions panel."""
+    return Panel(
+        "[white]Type your natural language command and press Enter.\n"
+        "Commands: [bold cyan]exit[/bold cyan], [bold cyan]quit[/bold cyan], [bold cyan]help[/bold cyan], [bold cyan]config[/bold cyan][/white]",
+        title="[bold yellow]📋 Instructions[/bold yellow]",
+        border_style="yellow",
+        box=box.ROUNDED
+    )
+
+
+# Longest input sent to the model; longer pastes are rejected locally
+MAX_INPUT_CHARS = 4000
+
+# Questions about the agent itself, answered without calling the model
+_CAPABILITY_PATTERN = re.compile(
+    r"^\s*(help|what can you do|what do you do|what are you)\s*[?.!]*\s*$",
+    re.IGNORECASE
+)
+
+_CAPABILITY_RESPONSE = """I translate plain-English requests into PowerShell and run them for you. I can:
+
+- **Execute commands**, e.g. list files, inspect processes or services
+- **Run several commands at once** when a request needs more than one
+- **Look up help** for cmdlets with `Get-Help`
+
+Try *"Show me the top 5 processes by CPU usage"* or type `help` for more examples."""
+
+
+def _maybe_direct_response(user_input: str) -> str | None:
     """
-    Run the PowerShell agent with user input.
+    Answer trivial or malformed inputs locally so they don't use a rate-limit token.
     
     Args:
         user_input: Natural language instruction from the user
+    
+    Returns:
+        A canned response, or None if the input should go to the agent
     """
-    # Display user query in a panel
+    text = user_input.strip()
+    if not text:
+        return "Please enter a request, for example *\"List all files in the current directory\"*."
+    if len(text) > MAX_INPUT_CHARS:
+        return f"That input is {len(text)} characters long. Please keep requests under {MAX_INPUT_CHARS} characters."
+    if not any(ch.isalpha() for ch in text):
+        return "I couldn't find a request in that input. Please describe what you want PowerShell to do."
+    if _CAPABILITY_PATTERN.match(text):
+        return _CAPABILITY_RESPONSE
+    return None
+
+
+def _response_panel(response: str) -> Panel:
+    """Build the panel that displays an agent response."""
+    return Panel(
+        Markdown(response),
+        title="[bold magenta]🤖 Agent Response[/bold magenta]",
+        border_style="magenta",
+        box=box.ROUNDED,
+        padding=(1, 2)
+    )
+
+
+def _print_response(response: str):
+    """Display the agent response in a panel."""
+    console.print(_response_panel(response))
+    console.print()
+
+
+def _print_request(user_input: str):
+    """Display the user query in a panel."""
     console.print(Panel(
         f"[bold white]{user_input}[/bold white]",
         title="[bold green]👤 Your Request[/bold green]",
@@ -242,53 +934,160 @@ def run_agent(user_input: str):
         box=box.ROUNDED
     ))
     console.print()
+
+
+def _print_error(error: Exception):
+    """Display an agent error in a panel."""
+    error_msg = f"Error running agent: {str(error)}"
+    console.print(Panel(
+        f"[bold red]{error_msg}[/bold red]",
+        title="[bold red]❌ Error[/bold red]",
+        border_style="red",
+        box=box.ROUNDED
+    ))
+    console.print()
+
+
+def run_agent(user_input: str):
+    """
+    Run the PowerShell agent with user input.
+    
+    Args:
+        user_input: Natural language instruction from the user
+    """
+    # Display user query in a panel
+    _print_request(user_input)
+    
+    # Answer trivial inputs locally to save the rate-limit budget
+    direct = _maybe_direct_response(user_input)
+    if direct is not None:
+        _print_response(direct)
+        return direct
+    
+    # Serve repeated requests from the session cache without calling the model
+    cache_key = user_input.strip().lower()
+    if cache_key in _exact_cache:
+        response = _exact_cache[cache_key]
+        _print_response(response)
+        return response
     
     try:
-        # Show processing indicator
-        with Progress(
-            SpinnerColumn("dots"),
-            TextColumn("[cyan]Processing your request...[/cyan]"),
+        agent, _ = _build_agent()
+        response = None
+        used_tools = False
+        # Stream agent state so tool calls and the answer appear as they are produced
+        with Live(
+            Text("Processing your request...", style="cyan"),
             console=console,
-            transient=True
-        ) as progress:
-            progress.add_task("", total=None)
-            # Invoke the agent
-            result = agent.invoke({"messages": [{"role": "user", "content": user_input}]})
-        
-        # Extract and print the response
-        if "messages" in result and len(result["messages"]) > 0:
-            last_message = result["messages"][-1]
-            response = last_message.content if hasattr(last_message, 'content') else str(last_message)
+            refresh_per_second=10
+        ) as live:
+            for state in agent.stream(
+                {"messages": [{"role": "user", "content": user_input}]},
+                stream_mode="values"
+            ):
+                last_message = state["messages"][-1]
+                for call in getattr(last_message, "tool_calls", None) or []:
+                    used_tools = True
+                    live.console.print(Text(f"🔧 {call['name']} {call['args']}", style="dim"))
+                if getattr(last_message, "type", None) == "ai" and last_message.content:
+                    response = last_message.content
+                    live.update(_response_panel(response))
             
-            # Display response in a panel
-            console.print(Panel(
-                Markdown(response),
-                title="[bold magenta]🤖 Agent Response[/bold magenta]",
-                border_style="magenta",
-                box=box.ROUNDED,
-                padding=(1, 2)
-            ))
-            console.print()
-            return response
-        else:
-            console.print("[yellow]⚠️  No response generated.[/yellow]\n")
-            return None
+            if response is None:
+                live.update(Text("⚠️  No response generated.", style="yellow"))
+        
+        console.print()
+        if response is not None and not used_tools:
+            _exact_cache[cache_key] = response
+        return response
             
     except Exception as e:
-        error_msg = f"Error running agent: {str(e)}"
-        console.print(Panel(
-            f"[bold red]{error_msg}[/bold red]",
-            title="[bold red]❌ Error[/bold red]",
-            border_style="red",
-            box=box.ROUNDED
-        ))
-        console.print()
+        _print_error(e)
         return None
 
 
+def run_agent_many(inputs: list[str]) -> list[str | None]:
+    """
+    Run the PowerShell agent on several inputs concurrently.
+    
+    The number of requests in flight adapts to observed latency and
+    provider errors (see AdaptiveConcurrency); results are displayed in
+    input order once all requests finish.
+    
+    All runs share the one PowerShell session, so their commands interleave
+    there. Only use this for independent queries that do not rely on the
+    working directory, variables or other session state.
+    
+    Args:
+        inputs: Natural language instructions from the user
+    
+    Returns:
+        The agent response for each input, or None where it failed
+    """
+    outcomes = asyncio.run(_run_agent_many(inputs))
+    
+    for user_input, (response, error) in zip(inputs, outcomes):
+        _print_request(user_input)
+        if error is not None:
+            _print_error(error)
+        elif response is None:
+            console.print("[yellow]⚠️  No response generated.[/yellow]\n")
+        else:
+            _print_response(response)
+    return [response for response, _ in outcomes]
+
+
+async def _run_agent_many(inputs: list[str]) -> list[tuple[str | None, Exception | None]]:
+    """Invoke the agent for each input under the adaptive concurrency limit."""
+    agent, _ = _build_agent()
+    slots = asyncio.Condition()
+    in_flight = 0
+    
+    async def run_one(user_input: str) -> tuple[str | None, Exception | None]:
+        nonlocal in_flight
+        direct = _maybe_direct_response(user_input)
+        if direct is not None:
+            return direct, None
+        cache_key = user_input.strip().lower()
+        if cache_key in _exact_cache:
+            return _exact_cache[cache_key], None
+        
+        async with slots:
+            await slots.wait_for(lambda: in_flight < concurrency.limit)
+            in_flight += 1
+        start = time.monotonic()
+        try:
+            result = await agent.ainvoke({"messages": [{"role": "user", "content": user_input}]})
+        except Exception as e:
+            status, _ = _error_status(e)
+            if status is not None and (status == 429 or status >= 500):
+                concurrency.record_overload()
+            return None, e
+        else:
+            concurrency.record_success(time.monotonic() - start)
+        finally:
+            async with slots:
+                in_flight -= 1
+                slots.notify_all()
+        
+        messages = result.get("messages") or []
+        if not messages:
+            return None, None
+        response = getattr(messages[-1], "content", None) or str(messages[-1])
+        if not any(getattr(message, "tool_calls", None) for message in messages):
+            _exact_cache[cache_key] = response
+        return response, None
+    
+    return await asyncio.gather(*(run_one(user_input) for user_input in inputs))
+
+
+# Inputs that end the interactive session
+EXIT_COMMANDS = {'exit', 'quit', 'q'}
+
+
 if __name__ == "__main__":
     # Clear screen (optional)
-    os.system('cls' if os.name == 'nt' else 'clear')
+    console.clear()
     
     # Display banner
     print_banner()
@@ -299,15 +1098,11 @@ if __name__ == "__main__":
     # Show example queries
     show_examples()
     
+    # Import LangChain and build the agent while the user reads the banner
+    threading.Thread(target=_warm_up_agent, daemon=True).start()
+    
     # Instructions
-    console.print(Panel(
-        "[white]Type your natural language command and press Enter.\n"
-        "Commands: [bold cyan]exit[/bold cyan], [bold cyan]quit[/bold cyan], [bold cyan]help[/bold cyan], [bold cyan]config[/bold cyan][/white]",
-        title="[bold yellow]📋 Instructions[/bold yellow]",
-        border_style="yellow",
-        box=box.ROUNDED
-    ))
-    console.print()
+    show_instructions()
     
     # Interactive loop
     while True:
@@ -319,14 +1114,15 @@ if __name__ == "__main__":
                 continue
             
             # Handle special commands
-            if user_input.lower() in ['exit', 'quit', 'q']:
+            cmd = user_input.lower()
+            if cmd in EXIT_COMMANDS:
                 console.print("\n[bold cyan]👋 Goodbye! Have a great day![/bold cyan]\n")
                 break
-            elif user_input.lower() == 'help':
+            elif cmd == 'help':
                 console.print()
                 show_examples()
                 continue
-            elif user_input.lower() == 'config':
+            elif cmd == 'config':
                 console.print()
                 show_config()
                 continue